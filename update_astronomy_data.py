@@ -1,19 +1,90 @@
 #!/usr/bin/env python3
 """
 Daily astronomy data updater script for AstroTrack
-Fetches data from JPL Horizons API and updates JSON file
+Computes planetary positions from a local JPL ephemeris (or, with --online,
+fetches them from the JPL Horizons API) and updates the JSON and NDJSON files
 """
 
+import argparse
+import asyncio
+import functools
+import inspect
 import json
-import requests
+import random
+import time
 from datetime import datetime, timedelta, timezone
 import os
 import sys
 import re
+import shutil
+import socket
+import tempfile
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
+from math import cos, radians, sin
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from jplephem.spk import SPK
+except ImportError:
+    SPK = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
 # Configuration
 HORIZONS_API_URL = "https://ssd.jpl.nasa.gov/api/horizons.api"
 OUTPUT_FILE = "astronomy_data.json"
+# Same data as one JSON record per line: a metadata header, then one line per body
+# (failed bodies carry an "error" field instead of x/y/z). Lines are written as
+# bodies arrive, so with --online their order follows request completion and can
+# differ between runs; consumers should key on "id" rather than line position.
+NDJSON_FILE = "astronomy_data.ndjson"
+
+# Connection pool size for the shared HTTP client (one slot per tracked body);
+# over HTTP/2 all requests are multiplexed onto a single connection
+HTTP_POOL_SIZE = 8
+HTTP_KEEPALIVE_TIMEOUT = 30
+HTTP_TIMEOUT = 30.0
+# Requests in flight at once, and retry policy for rate limiting and server errors
+MAX_CONCURRENT_REQUESTS = 4
+MAX_RETRIES = 3
+MAX_BACKOFF_SECONDS = 30
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Ask for compressed responses; the text ephemeris is highly repetitive ASCII
+HTTP_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'User-Agent': 'AstroTrack/1.0'
+}
+
+# On-disk cache of fetched vectors, so re-runs within the same window skip the API
+CACHE_FILE = ".horizons_cache.json"
+CACHE_TTL_SECONDS = 3600
+# Epochs are rounded down to this many minutes; AU-scale vectors barely move within it
+EPOCH_BUCKET_MINUTES = 15
+
+# Local ephemeris kernel (DE440 short span, 1849-2150), downloaded on first use
+EPHEMERIS_KERNEL = "de440s.bsp"
+EPHEMERIS_KERNEL_URL = "https://naif.jpl.nasa.gov/pub/naif/generic_kernels/spk/planets/de440s.bsp"
+# Seconds a stalled kernel download may block before falling back to Horizons
+KERNEL_DOWNLOAD_TIMEOUT = 60
+SUN_NAIF_ID = 10
+AU_KM = 149597870.7
+# Obliquity of the J2000 ecliptic, as used by Horizons for REF_PLANE=ECLIPTIC
+OBLIQUITY_J2000 = radians(84381.448 / 3600)
+# TT - UTC (37 leap seconds + 32.184 s); TDB differs from TT by under 2 ms
+TT_MINUS_UTC_SECONDS = 69.184
+# Spread local computation over worker processes once the body list is this long;
+# below it, process start-up costs more than evaluating the kernel in-process
+PARALLEL_BODY_THRESHOLD = 64
 
 # Default celestial bodies to track (you can modify this list)
 CELESTIAL_BODIES = {
@@ -27,56 +98,199 @@ CELESTIAL_BODIES = {
     "899": "Neptune"
 }
 
+# Data section of a Horizons ephemeris, and the unlabelled X Y Z columns of a
+# vector line (VEC_LABELS=NO puts them on the line after the JD/date line)
+_FLOAT = r'([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)'
+_SOE_RE = re.compile(r'\$\$SOE\s*\n(.*?)\n\$\$EOE', re.DOTALL)
+_XYZ_RE = re.compile(rf'^[ \t]*{_FLOAT}[ \t]+{_FLOAT}[ \t]+{_FLOAT}[ \t]*$', re.MULTILINE)
+
 def parse_vector_data(response_text):
     """
     Parse the vector data from JPL Horizons API response
     """
     try:
         # Look for the data section between $$SOE and $$EOE
-        soe_match = re.search(r'\$\$SOE\s*\n(.*?)\n\$\$EOE', response_text, re.DOTALL)
+        soe_match = _SOE_RE.search(response_text)
         if not soe_match:
             return None
-            
-        data_section = soe_match.group(1).strip()
-        lines = data_section.split('\n')
         
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('*'):
-                continue
-                
-            # Look for lines that contain X = Y = Z = coordinates
-            if 'X =' in line and 'Y =' in line and 'Z =' in line:
-                # Parse format: " X = 9.808796917387812E-01 Y = 1.956823623680619E-01 Z =-1.639457656712521E-05"
-                try:
-                    # Extract X, Y, Z values using regex
-                    x_match = re.search(r'X\s*=\s*([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)', line)
-                    y_match = re.search(r'Y\s*=\s*([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)', line)
-                    z_match = re.search(r'Z\s*=\s*([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?)', line)
-                    
-                    if x_match and y_match and z_match:
-                        x = float(x_match.group(1))
-                        y = float(y_match.group(1))
-                        z = float(z_match.group(1))
-                        return {"x": x, "y": y, "z": z}
-                except (ValueError, AttributeError):
-                    continue
-                    
-        return None
+        # Parse format: "  9.808796917387812E-01  1.956823623680619E-01 -1.639457656712521E-05"
+        # A single regex search stops at the first vector line, i.e. the first
+        # ephemeris record; that is all we need since TLIST requests one epoch.
+        xyz_match = _XYZ_RE.search(response_text, soe_match.start(1), soe_match.end(1))
+        if not xyz_match:
+            return None
+        
+        return {
+            "x": float(xyz_match.group(1)),
+            "y": float(xyz_match.group(2)),
+            "z": float(xyz_match.group(3))
+        }
     except Exception as e:
         print(f"Error parsing vector data: {e}")
         return None
 
-def fetch_horizons_data(body_id, body_name):
+def error_record(body_id, body_name, message):
     """
-    Fetch ephemeris data from JPL Horizons API for a specific celestial body
+    Output record for a body whose position could not be obtained
+    """
+    return {
+        "id": body_id,
+        "name": body_name,
+        "error": message
+    }
+
+def horizons_epoch(now):
+    """
+    UTC time rounded down to the epoch bucket
+    """
+    return now.replace(minute=now.minute - now.minute % EPOCH_BUCKET_MINUTES,
+                       second=0, microsecond=0)
+
+_cache = None
+
+def load_cache():
+    """
+    Load the on-disk fetch cache, dropping expired entries
+    """
+    global _cache
+    if _cache is None:
+        try:
+            with open(CACHE_FILE, 'rb') as f:
+                raw = f.read()
+            _cache = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except (IOError, ValueError):
+            _cache = {}
+        if not isinstance(_cache, dict):
+            _cache = {}
+        
+        # Keep only well-formed, unexpired entries; anything else is treated as a miss
+        now = time.time()
+        _cache = {key: entry for key, entry in _cache.items()
+                  if isinstance(entry, dict)
+                  and isinstance(entry.get("expires_at"), (int, float))
+                  and entry["expires_at"] > now
+                  and isinstance(entry.get("result"), dict)}
+    return _cache
+
+def open_atomic(path):
+    """
+    Open a temporary file next to path, to be renamed over it by commit_atomic
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    return tempfile.NamedTemporaryFile('wb', dir=directory, delete=False)
+
+def commit_atomic(f, path):
+    """
+    Close a file from open_atomic and rename it over path
+    """
+    f.close()
+    # NamedTemporaryFile creates files as 0600; give the usual open() mode instead,
+    # which is 0666 minus the umask (read by setting it and restoring it)
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(f.name, 0o666 & ~umask)
+    os.replace(f.name, path)
+
+def discard_atomic(f):
+    """
+    Close and delete a file from open_atomic without touching the target
+    """
+    f.close()
+    os.unlink(f.name)
+
+def write_atomic(path, payload):
+    """
+    Write bytes to path via a temporary file and rename, so readers never see a partial file
+    """
+    f = open_atomic(path)
+    try:
+        f.write(payload)
+    except BaseException:
+        discard_atomic(f)
+        raise
+    commit_atomic(f, path)
+
+def save_cache():
+    """
+    Write the fetch cache back to disk
+    """
+    if _cache is None:
+        return
+    try:
+        if orjson is not None:
+            payload = orjson.dumps(_cache)
+        else:
+            payload = json.dumps(_cache).encode('utf-8')
+        write_atomic(CACHE_FILE, payload)
+    except IOError as e:
+        print(f"Error saving cache: {e}")
+
+def cached_fetch(func):
+    """
+    Serve fetches from the on-disk cache keyed by body ID and epoch bucket;
+    new entries are written to disk once per run by save_cache
     """
-    # Use a single timestamp (current UTC) for TLIST
-    time_str = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M')
+    signature = inspect.signature(func)
     
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        body_id = arguments["body_id"]
+        key = f"{body_id}:{arguments['time_str']}"
+        cache = load_cache()
+        
+        # load_cache has already dropped expired entries
+        entry = cache.get(key)
+        if entry:
+            print(f"Using cached data for {arguments['body_name']} (ID: {body_id})")
+            return entry["result"]
+        
+        result = await func(*args, **kwargs)
+        
+        # Only cache successful lookups so failures are retried next run
+        if "error" not in result:
+            cache[key] = {
+                "expires_at": time.time() + CACHE_TTL_SECONDS,
+                "result": result
+            }
+        return result
+    return wrapper
+
+def retry_delay(response, attempt):
+    """
+    Seconds to wait before retrying, honouring a numeric Retry-After header
+    """
+    retry_after = response.headers.get('Retry-After', '')
+    if retry_after.isdigit():
+        return min(MAX_BACKOFF_SECONDS, int(retry_after))
+    return min(MAX_BACKOFF_SECONDS, 2 ** attempt + random.random())
+
+async def request_horizons(client, slots, params):
+    """
+    GET the Horizons API, bounded by the slots semaphore and retrying with
+    exponential backoff on rate limiting and transient server errors
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        async with slots:
+            response = await client.get(HORIZONS_API_URL, params=params)
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            response.raise_for_status()
+            return response.text
+        delay = retry_delay(response, attempt)
+        
+        # Back off outside the semaphore so other bodies can use the slot
+        print(f"Horizons returned {response.status_code}, retrying in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+@cached_fetch
+async def fetch_horizons_data(client, slots, body_id, body_name, time_str):
+    """
+    Fetch ephemeris data from JPL Horizons API for a specific celestial body
+    """
     # Horizons API parameters (matching JS version)
     params = {
-        'format': 'json',
+        'format': 'text',
         'COMMAND': f"'{body_id}'",
         'OBJ_DATA': 'NO',
         'MAKE_EPHEM': 'YES',
@@ -85,19 +299,16 @@ def fetch_horizons_data(body_id, body_name):
         'REF_PLANE': 'ECLIPTIC',
         'OUT_UNITS': 'AU-D',
         'VEC_TABLE': '1',
+        'VEC_LABELS': 'NO',
+        'CSV_FORMAT': 'NO',
         'TIME_TYPE': 'UT',
         'TLIST': f"'{time_str}'"
     }
     
     try:
         print(f"Fetching data for {body_name} (ID: {body_id})...")
-        response = requests.get(HORIZONS_API_URL, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Get the result text from the API response
-        result_text = data.get("result", "")
+        # Plain-text output is the same ephemeris without the JSON envelope
+        result_text = await request_horizons(client, slots, params)
         
         # Parse vector coordinates
         vector_data = parse_vector_data(result_text)
@@ -113,36 +324,217 @@ def fetch_horizons_data(body_id, body_name):
             }
         else:
             print(f"Could not parse vector data for {body_name}")
-            return {
-                "id": body_id,
-                "name": body_name,
-                "error": "Could not parse vector data"
-            }
+            return error_record(body_id, body_name, "Could not parse vector data")
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Error fetching data for {body_name}: {e}")
-        return {
-            "id": body_id,
-            "name": body_name,
-            "error": str(e)
-        }
+        return error_record(body_id, body_name, str(e))
+
+# Remove the load_existing_data function since we're creating fresh data each time
+
+async def fetch_body_safely(client, slots, body_id, body_name, time_str):
+    """
+    Fetch a single body, converting any escaped exception into an error record
+    """
+    try:
+        return await fetch_horizons_data(client, slots, body_id, body_name, time_str)
     except Exception as e:
         print(f"Unexpected error for {body_name}: {e}")
+        return error_record(body_id, body_name, str(e))
+
+def record_body(output_data, body_data, stream):
+    """
+    Route a body into the successful or failed list and append it to the NDJSON stream
+    """
+    if "error" in body_data:
+        output_data["failed"].append(body_data)
+    else:
+        output_data["bodies"].append(body_data)
+    stream.write(dumps_line(body_data))
+
+async def fetch_all_bodies(output_data, time_str, stream):
+    """
+    Fetch all celestial bodies concurrently over a single HTTP/2 client,
+    recording each one as soon as its request completes
+    """
+    if httpx is None:
+        print("httpx is not installed; cannot reach JPL Horizons API")
+        for body_id, body_name in CELESTIAL_BODIES.items():
+            record_body(output_data, error_record(body_id, body_name, "httpx is not installed"),
+                        stream)
+        return
+    
+    # Horizons accepts a single COMMAND target per request (the file API is no
+    # different), so bodies are fetched one request each over shared keep-alive
+    # connections rather than as one batched query. If the server only speaks
+    # HTTP/1.1, httpx falls back to a pool of keep-alive connections.
+    limits = httpx.Limits(max_connections=HTTP_POOL_SIZE,
+                          max_keepalive_connections=HTTP_POOL_SIZE,
+                          keepalive_expiry=HTTP_KEEPALIVE_TIMEOUT)
+    async with httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT, limits=limits,
+                                 headers=HTTP_HEADERS) as client:
+        # Bounds requests in flight; created here so it binds to the running event loop
+        slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        tasks = [asyncio.create_task(fetch_body_safely(client, slots, body_id, body_name, time_str))
+                 for body_id, body_name in CELESTIAL_BODIES.items()]
+        for next_result in asyncio.as_completed(tasks):
+            record_body(output_data, await next_result, stream)
+    
+    # Persist newly fetched bodies in a single write rather than one per body
+    save_cache()
+    
+    # Completion order is arbitrary; keep the JSON lists in CELESTIAL_BODIES order
+    body_order = list(CELESTIAL_BODIES)
+    for key in ("bodies", "failed"):
+        output_data[key].sort(key=lambda body: body_order.index(body["id"]))
+
+def ensure_kernel():
+    """
+    Download the ephemeris kernel if it is not already present
+    """
+    if os.path.exists(EPHEMERIS_KERNEL):
+        return True
+    partial_path = EPHEMERIS_KERNEL + ".part"
+    try:
+        print(f"Downloading ephemeris kernel {EPHEMERIS_KERNEL}...")
+        with urllib.request.urlopen(EPHEMERIS_KERNEL_URL,
+                                    timeout=KERNEL_DOWNLOAD_TIMEOUT) as response, \
+                open(partial_path, 'wb') as f:
+            shutil.copyfileobj(response, f)
+        os.replace(partial_path, EPHEMERIS_KERNEL)
+        return True
+    except (OSError, socket.timeout) as e:
+        print(f"Error downloading ephemeris kernel: {e}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        return False
+
+def julian_date_tdb(when):
+    """
+    Convert a UTC datetime to a TDB Julian date for the SPK kernel
+    """
+    return 2440587.5 + (when.timestamp() + TT_MINUS_UTC_SECONDS) / 86400.0
+
+def barycentric_position(kernel, naif_id, jd):
+    """
+    Position of a body relative to the solar system barycenter, in km
+    """
+    if (0, naif_id) in kernel.pairs:
+        return kernel[0, naif_id].compute(jd)
+    
+    # Planets are stored as an offset from their system barycenter. de440s only
+    # carries that offset for Mercury, Venus and Earth; for the outer planets the
+    # barycenter is used, at most a few hundred km (~2e-6 AU) from the planet center.
+    barycenter = naif_id // 100
+    position = kernel[0, barycenter].compute(jd)
+    if (barycenter, naif_id) in kernel.pairs:
+        position = position + kernel[barycenter, naif_id].compute(jd)
+    return position
+
+def compute_local_data(kernel, body_id, body_name, jd):
+    """
+    Compute heliocentric ecliptic coordinates for a body from the local kernel
+    """
+    try:
+        x, y, z = (barycentric_position(kernel, int(body_id), jd)
+                   - barycentric_position(kernel, SUN_NAIF_ID, jd)) / AU_KM
+        
+        # Rotate from the ICRF equator to the J2000 ecliptic
         return {
             "id": body_id,
             "name": body_name,
-            "error": str(e)
+            "type": "planet",
+            "x": float(x),
+            "y": float(y * cos(OBLIQUITY_J2000) + z * sin(OBLIQUITY_J2000)),
+            "z": float(-y * sin(OBLIQUITY_J2000) + z * cos(OBLIQUITY_J2000))
         }
+    except Exception as e:
+        print(f"Error computing position for {body_name}: {e}")
+        return error_record(body_id, body_name, str(e))
 
-# Remove the load_existing_data function since we're creating fresh data each time
+_worker_kernel = None
+
+def init_kernel_worker():
+    """
+    Open the ephemeris kernel once per worker process; the file is memory-mapped,
+    so workers share its pages through the OS page cache
+    """
+    global _worker_kernel
+    _worker_kernel = SPK.open(EPHEMERIS_KERNEL)
+
+def compute_body(body_id, body_name, jd):
+    """
+    Compute a single body in a worker process
+    """
+    return compute_local_data(_worker_kernel, body_id, body_name, jd)
+
+def compute_all_bodies(output_data, epoch, stream):
+    """
+    Compute all celestial bodies from the local ephemeris kernel
+    """
+    if SPK is None:
+        print("jplephem is not installed")
+        return False
+    if not ensure_kernel():
+        return False
+    
+    jd = julian_date_tdb(epoch)
+    if len(CELESTIAL_BODIES) >= PARALLEL_BODY_THRESHOLD:
+        # Only reached with 64+ bodies, so the default 8-planet run never takes
+        # this branch; lower PARALLEL_BODY_THRESHOLD to exercise it by hand.
+        # Workers each open their own kernel in init_kernel_worker.
+        try:
+            with ProcessPoolExecutor(initializer=init_kernel_worker) as executor:
+                results = list(executor.map(compute_body, CELESTIAL_BODIES.keys(),
+                                            CELESTIAL_BODIES.values(), repeat(jd),
+                                            chunksize=16))
+        except (OSError, ValueError, BrokenProcessPool) as e:
+            print(f"Error computing positions in worker processes: {e}")
+            return False
+        for body_data in results:
+            record_body(output_data, body_data, stream)
+        return True
+    
+    try:
+        kernel = SPK.open(EPHEMERIS_KERNEL)
+    except (OSError, ValueError) as e:
+        print(f"Error opening ephemeris kernel: {e}")
+        return False
+    try:
+        for body_id, body_name in CELESTIAL_BODIES.items():
+            record_body(output_data, compute_local_data(kernel, body_id, body_name, jd), stream)
+    finally:
+        kernel.close()
+    return True
+
+def dumps_line(record):
+    """
+    Serialize a record as a single NDJSON line
+    """
+    if orjson is not None:
+        return orjson.dumps(record) + b'\n'
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def open_ndjson_stream(output_data):
+    """
+    Start the NDJSON output with its metadata header; bodies are appended by record_body
+    """
+    stream = open_atomic(NDJSON_FILE)
+    header = {key: value for key, value in output_data.items()
+              if key not in ("bodies", "failed")}
+    stream.write(dumps_line(header))
+    return stream
 
 def save_data(data):
     """
     Save data to JSON file
     """
     try:
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        write_atomic(OUTPUT_FILE, payload)
         print(f"Data successfully saved to {OUTPUT_FILE}")
         return True
     except IOError as e:
@@ -153,13 +545,24 @@ def main():
     """
     Main function to update astronomy data
     """
+    parser = argparse.ArgumentParser(description="Update AstroTrack astronomy data")
+    parser.add_argument("--online", action="store_true",
+                        help="fetch positions from the JPL Horizons API instead of the local ephemeris")
+    args = parser.parse_args()
+    
     print("Starting astronomy data update...")
     current_time = datetime.now(timezone.utc)
     print(f"Timestamp: {current_time.isoformat()}")
+    # One epoch for every body and for both data sources, so the output means
+    # the same thing whether the local or the Horizons path produced it
+    epoch = horizons_epoch(current_time)
+    time_str = epoch.strftime('%Y-%m-%d %H:%M')
     
     # Initialize the output structure
     output_data = {
         "timestamp_utc": current_time.strftime('%Y-%b-%d %H:%M:%S'),
+        # Instant the positions are for; the run time rounded down to the epoch bucket
+        "epoch_utc": epoch.strftime('%Y-%b-%d %H:%M:%S'),
         "center": "Sun",
         "ref_plane": "ECLIPTIC", 
         "units": {
@@ -169,28 +572,37 @@ def main():
         "failed": []
     }
     
-    # Fetch data for each celestial body
-    successful_updates = 0
-    total_bodies = len(CELESTIAL_BODIES)
+    stream = open_ndjson_stream(output_data)
+    try:
+        # Compute each celestial body locally, falling back to Horizons if the kernel is unavailable
+        if args.online or not compute_all_bodies(output_data, epoch, stream):
+            if not args.online:
+                print("Falling back to JPL Horizons API...")
+            asyncio.run(fetch_all_bodies(output_data, time_str, stream))
+    except BaseException:
+        discard_atomic(stream)
+        raise
     
-    for body_id, body_name in CELESTIAL_BODIES.items():
-        body_data = fetch_horizons_data(body_id, body_name)
-        
-        if "error" in body_data:
-            output_data["failed"].append(body_data)
-        else:
-            output_data["bodies"].append(body_data)
-            successful_updates += 1
+    successful_updates = len(output_data["bodies"])
+    total_bodies = len(CELESTIAL_BODIES)
     
-    # Save updated data
-    if save_data(output_data):
-        print(f"Update completed successfully! {successful_updates}/{total_bodies} bodies updated.")
-        if output_data["failed"]:
-            print(f"Failed to fetch data for {len(output_data['failed'])} bodies.")
-        sys.exit(0)
-    else:
+    # Save updated data; the NDJSON only replaces the old file once the JSON
+    # write has succeeded, so a failed run never leaves them out of step
+    if not save_data(output_data):
+        discard_atomic(stream)
         print("Failed to save data!")
         sys.exit(1)
+    try:
+        commit_atomic(stream, NDJSON_FILE)
+        print(f"Data successfully saved to {NDJSON_FILE}")
+    except IOError as e:
+        print(f"Error saving data: {e}")
+        sys.exit(1)
+    
+    print(f"Update completed successfully! {successful_updates}/{total_bodies} bodies updated.")
+    if output_data["failed"]:
+        print(f"Failed to fetch data for {len(output_data['failed'])} bodies.")
+    sys.exit(0)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file